@@ -48,20 +48,12 @@ const App: React.FC = () => {
       }, 2500);
 
       const response = await downloadMedia(url, format);
-      
+
       clearInterval(progressTimer);
       setProgress('Finalizing download...');
 
-      if (response.status === 'error') {
-        throw new Error(response.message || 'Unknown error occurred');
-      }
+      triggerBrowserDownload(response.blob, response.filename);
 
-      // Determine MIME type based on actual filename extension
-      const ext = response.filename.split('.').pop()?.toLowerCase();
-      const mimeType = ext === 'mp3' ? 'audio/mpeg' : 'video/mp4';
-      
-      triggerBrowserDownload(response.data, response.filename, mimeType);
-      
       setSuccess(`Downloaded ${response.filename} successfully!`);
       setUrl(''); // Reset input on success
       setTimeout(() => setSuccess(null), 5000);
@@ -3,21 +3,37 @@ FastAPI Backend for Media Download
 Supports YouTube and Instagram video downloads with automatic platform detection.
 """
 
-from fastapi import FastAPI
+from fastapi import BackgroundTasks, FastAPI, Header
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel, ConfigDict
 from typing import Literal, Optional
+import asyncio
+import sys
+import threading
+import aiofiles
 import yt_dlp
-import base64
+import pybase64
+import hashlib
+import json
 import os
-import uuid
-import glob
+import re
+import time
 import shutil
+from pathlib import Path
+from cachetools import TTLCache
+
+try:
+    import hyperscan
+except ImportError:
+    # Optional: only pays off when classifying URLs in bulk
+    hyperscan = None
 
 app = FastAPI(
     title="Media Download API",
     description="Download videos from YouTube and Instagram",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -26,13 +42,89 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Content-Disposition"],
 )
 
 # Constants
-TEMP_DIR = "temp_downloads"
+# Prefer RAM-backed tmpfs: every download is written then read back and
+# deleted, so there is no reason to touch persistent storage for it
+TEMP_DIR = os.environ.get(
+    "PASTELINK_TMP",
+    "/dev/shm/pastelink" if os.path.isdir("/dev/shm") else "temp_downloads",
+)
+# Multiple of 3 so every chunk encodes without padding and chunks concatenate cleanly
+ENCODE_CHUNK_SIZE = 3 * 1024 * 1024
+STREAM_CHUNK_SIZE = 1024 * 1024
+SWEEP_INTERVAL_SECONDS = 300
+DOWNLOAD_CACHE_SIZE = 256
+DOWNLOAD_CACHE_TTL_SECONDS = 3600
+# Files outlive their cache entry slightly; the sweeper reclaims them
+SWEEP_MAX_AGE_SECONDS = DOWNLOAD_CACHE_TTL_SECONDS + SWEEP_INTERVAL_SECONDS
+
+class FileDroppingTTLCache(TTLCache):
+    """
+    TTLCache that unlinks an entry's backing file on eviction.
+
+    Covers both maxsize pressure (popitem) and TTL expiry (expire), so
+    a cached download never outlives its cache entry on tmpfs. Entries
+    removed explicitly with pop/del keep their file; the only such
+    caller is the stale-hit path, where the file is already gone.
+    """
+
+    def popitem(self):
+        key, value = super().popitem()
+        cleanup_file(value[0])
+        return key, value
+
+    def expire(self, time=None):
+        expired = super().expire(time)
+        for _, value in expired or ():
+            cleanup_file(value[0])
+        return expired
+
+
+# Completed downloads kept around for repeat requests:
+# (url, format) -> (path, filename, media type)
+DOWNLOAD_CACHE: TTLCache = FileDroppingTTLCache(
+    maxsize=DOWNLOAD_CACHE_SIZE, ttl=DOWNLOAD_CACHE_TTL_SECONDS
+)
+
+# Single-flight bookkeeping: (url, format) -> Future resolving to the
+# (path, filename, media type) of a download already in progress
+INFLIGHT_DOWNLOADS: dict = {}
 COOKIES_YOUTUBE = "cookies_youtube.txt"
 COOKIES_INSTAGRAM = "cookies_instagram.txt"
 
+# Resolved once at import so the per-request path never calls os.getcwd()
+COOKIES_YOUTUBE_PATH = os.path.join(os.getcwd(), COOKIES_YOUTUBE)
+COOKIES_INSTAGRAM_PATH = os.path.join(os.getcwd(), COOKIES_INSTAGRAM)
+
+os.makedirs(TEMP_DIR, exist_ok=True)
+
+# One case-insensitive pass over the URL instead of a lowered copy plus
+# a substring scan per platform marker
+PLATFORM_PATTERN = re.compile(r"(?i)(instagram\.com|/reels?/|youtube\.com|youtu\.be)")
+PLATFORM_MAP = {
+    "instagram.com": "instagram",
+    "/reel/": "instagram",
+    "/reels/": "instagram",
+    "youtube.com": "youtube",
+    "youtu.be": "youtube",
+}
+
+# With hyperscan installed, all platform markers compile into one DFA
+# that matches in a single linear pass -- same result as the regex
+# fallback, but it stays flat when classifying URLs in bulk
+HYPERSCAN_PLATFORMS = ("instagram", "youtube")
+HYPERSCAN_DB = None
+if hyperscan is not None:
+    HYPERSCAN_DB = hyperscan.Database()
+    HYPERSCAN_DB.compile(
+        expressions=[rb"instagram\.com", rb"/reels?/", rb"youtube\.com", rb"youtu\.be"],
+        ids=[0, 0, 1, 1],
+        flags=[hyperscan.HS_FLAG_CASELESS] * 4,
+    )
+
 
 class DownloadRequest(BaseModel):
     """Request model - only URL field required"""
@@ -40,8 +132,15 @@ class DownloadRequest(BaseModel):
     format: Optional[Literal['mp4', 'mp3']] = 'mp4'  # Optional: default to mp4
 
 
+class MediaUnavailableError(Exception):
+    """Raised when a download cannot be served; the message is client-facing."""
+
+
 class DownloadResponse(BaseModel):
-    """Response model with status, filename, data, and message"""
+    """JSON envelope used for errors and the legacy base64 response"""
+    # The data field can carry hundreds of MB of base64; skip revalidation
+    model_config = ConfigDict(validate_assignment=False, arbitrary_types_allowed=True)
+
     status: Literal['success', 'error']
     filename: str
     data: str
@@ -58,15 +157,23 @@ def detect_platform(url: str) -> str:
     Returns:
         Platform name: 'youtube', 'instagram', or 'unsupported'
     """
-    url_lower = url.lower()
-    
-    if "instagram.com" in url_lower or "/reel/" in url_lower or "/reels/" in url_lower:
-        return "instagram"
-    elif "youtube.com" in url_lower or "youtu.be" in url_lower:
-        return "youtube"
-    else:
+    if HYPERSCAN_DB is not None:
+        matched: list = []
+        HYPERSCAN_DB.scan(
+            url.encode(),
+            match_event_handler=lambda pattern_id, start, end, flags, ctx: matched.append(pattern_id),
+        )
+
+        if matched:
+            return HYPERSCAN_PLATFORMS[matched[0]]
         return "unsupported"
 
+    match = PLATFORM_PATTERN.search(url)
+
+    if match:
+        return PLATFORM_MAP[match.group(1).lower()]
+    return "unsupported"
+
 
 def get_youtube_options(output_template: str, format_type: str = 'mp4') -> dict:
     """
@@ -79,8 +186,8 @@ def get_youtube_options(output_template: str, format_type: str = 'mp4') -> dict:
     Returns:
         Dictionary of yt_dlp options
     """
-    cookie_file = os.path.join(os.getcwd(), COOKIES_YOUTUBE)
-    
+    cookie_file = COOKIES_YOUTUBE_PATH
+
     if format_type == 'mp3':
         return {
             "format": "bestaudio/best",
@@ -121,8 +228,8 @@ def get_instagram_options(output_template: str) -> dict:
     Returns:
         Dictionary of yt_dlp options
     """
-    cookie_file = os.path.join(os.getcwd(), COOKIES_INSTAGRAM)
-    
+    cookie_file = COOKIES_INSTAGRAM_PATH
+
     return {
         "format": "best[ext=mp4]/best",
         "outtmpl": output_template,
@@ -136,34 +243,401 @@ def get_instagram_options(output_template: str) -> dict:
     }
 
 
-def find_downloaded_file(temp_dir: str, unique_id: str) -> Optional[str]:
+def sanitize_title(title: str) -> str:
+    """
+    Turn a media title into a filesystem- and header-safe filename stem.
+
+    Args:
+        title: Raw media title from yt_dlp
+
+    Returns:
+        Cleaned title limited to 100 characters
+    """
+    safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
+    return safe_title[:100]
+
+
+def build_ytdl_pipe_command(ydl_opts: dict, url: str) -> list:
+    """
+    Build a yt_dlp CLI invocation that writes the media to stdout.
+
+    Only valid for single-format downloads (no merge or ffmpeg
+    post-processing), where yt_dlp supports '-o -'.
+
+    Args:
+        ydl_opts: yt_dlp options dictionary to mirror on the CLI
+        url: Media URL to download
+
+    Returns:
+        Argument list for asyncio.create_subprocess_exec
+    """
+    cmd = [
+        sys.executable, "-m", "yt_dlp",
+        "--quiet", "--no-warnings", "--no-check-certificate",
+        "-f", ydl_opts["format"],
+        "-o", "-",
+    ]
+
+    if ydl_opts.get("cookiefile"):
+        cmd += ["--cookies", ydl_opts["cookiefile"]]
+
+    for name, value in ydl_opts.get("http_headers", {}).items():
+        cmd += ["--add-header", f"{name}:{value}"]
+
+    cmd.append(url)
+    return cmd
+
+
+async def stream_process_stdout(proc):
+    """
+    Yield a subprocess's stdout in chunks, reaping it when done.
+
+    Raises when the process exits nonzero so the chunked response is
+    aborted mid-stream instead of ending cleanly and passing an empty
+    or truncated file off as a successful download.
+
+    Args:
+        proc: asyncio subprocess with stdout=PIPE
+    """
+    try:
+        while chunk := await proc.stdout.read(STREAM_CHUNK_SIZE):
+            yield chunk
+        await proc.wait()
+
+        if proc.returncode != 0:
+            raise RuntimeError(f"yt_dlp exited with status {proc.returncode}")
+    finally:
+        if proc.returncode is None:
+            proc.kill()
+
+
+class PooledYoutubeDL:
+    """
+    A reusable YoutubeDL instance checked out by one request at a time.
+
+    YoutubeDL.__init__ registers every extractor, compiles their regexes,
+    and opens the cookie jar -- significant fixed cost per request -- so
+    finished instances go back to a per-(platform, format) free list and
+    are reused. YoutubeDL is not reentrant, but checkout via acquire_ydl
+    is exclusive, so probe/download need no locking and concurrent
+    downloads of the same kind never wait on each other.
+    """
+
+    def __init__(self, ydl_opts: dict):
+        self.state: dict = {}
+        opts = dict(ydl_opts)
+        opts["progress_hooks"] = [make_progress_hook(self.state)]
+        self.ydl = yt_dlp.YoutubeDL(opts)
+
+    def _set_output_template(self, output_template: str) -> None:
+        outtmpl = self.ydl.params.get("outtmpl")
+        if isinstance(outtmpl, dict):
+            outtmpl["default"] = output_template
+        else:
+            self.ydl.params["outtmpl"] = output_template
+
+    def probe(self, url: str) -> dict:
+        """Fetch media metadata without downloading; run in a worker thread."""
+        return self.ydl.extract_info(url, download=False)
+
+    def download(self, url: str, output_template: str) -> tuple:
+        """
+        Download media to the given template; run in a worker thread.
+
+        Args:
+            url: Media URL to download
+            output_template: Per-request output path template
+
+        Returns:
+            Tuple of (info dict, filename recorded by the progress hook)
+        """
+        self.state.clear()
+        self._set_output_template(output_template)
+        info = self.ydl.extract_info(url, download=True)
+        return info, self.state.get("filename")
+
+
+# Idle instances per (platform, format); checked-out ones live with
+# their request until release_ydl returns them
+YDL_POOL: dict = {}
+YDL_POOL_LOCK = threading.Lock()
+YDL_POOL_MAX_IDLE = 4
+
+
+def acquire_ydl(platform: str, format_type: str) -> PooledYoutubeDL:
+    """
+    Check out a YoutubeDL instance for a platform/format combination.
+
+    Reuses an idle pooled instance when one is free and builds a fresh
+    one otherwise, so a burst of downloads is never serialized behind a
+    shared instance.
+
+    Args:
+        platform: 'youtube' or 'instagram'
+        format_type: 'mp4' or 'mp3'
+
+    Returns:
+        PooledYoutubeDL ready for probe/download calls
+    """
+    with YDL_POOL_LOCK:
+        idle = YDL_POOL.get((platform, format_type))
+        if idle:
+            return idle.pop()
+
+    placeholder = os.path.join(TEMP_DIR, "%(id)s.%(ext)s")
+
+    if platform == "instagram":
+        ydl_opts = get_instagram_options(placeholder)
+    else:
+        ydl_opts = get_youtube_options(placeholder, format_type)
+
+    if ydl_opts.get("cookiefile") is None:
+        del ydl_opts["cookiefile"]
+
+    return PooledYoutubeDL(ydl_opts)
+
+
+def release_ydl(platform: str, format_type: str, entry: PooledYoutubeDL) -> None:
+    """
+    Return a checked-out instance to the free list.
+
+    Drops the instance when the free list is already at capacity so a
+    one-off burst does not pin memory forever.
+
+    Args:
+        platform: 'youtube' or 'instagram'
+        format_type: 'mp4' or 'mp3'
+        entry: Instance previously returned by acquire_ydl
+    """
+    with YDL_POOL_LOCK:
+        idle = YDL_POOL.setdefault((platform, format_type), [])
+        if len(idle) < YDL_POOL_MAX_IDLE:
+            idle.append(entry)
+
+
+def free_space_bytes(path: str) -> int:
+    """
+    Free bytes on the filesystem containing path.
+
+    Args:
+        path: Any path on the filesystem to measure
+
+    Returns:
+        Bytes available to unprivileged writers
+    """
+    stats = os.statvfs(path)
+    return stats.f_bavail * stats.f_frsize
+
+
+def evict_cached_downloads(bytes_needed: int) -> None:
+    """
+    Evict least-recently-used cached downloads until bytes_needed fits.
+
+    Eviction unlinks the backing files via FileDroppingTTLCache, so
+    idle cached media never blocks a fresh download from being stored.
+
+    Args:
+        bytes_needed: Free space the next download requires
+    """
+    while DOWNLOAD_CACHE and free_space_bytes(TEMP_DIR) < bytes_needed:
+        DOWNLOAD_CACHE.popitem()
+
+
+def download_cache_key(url: str, format_type: str) -> str:
+    """
+    Deterministic temp-filename stem for a (url, format) pair.
+
+    Identical requests map to identical paths, so a repeat download
+    lands on (and can be served from) the same file.
+
+    Args:
+        url: Media URL
+        format_type: 'mp4' or 'mp3'
+
+    Returns:
+        40-character sha1 hex digest
+    """
+    return hashlib.sha1(f"{url}:{format_type}".encode()).hexdigest()
+
+
+def find_downloaded_file(temp_dir: str, download_id: str) -> Optional[str]:
     """
     Find the downloaded file in the temp directory.
-    
+
+    A plain os.scandir prefix match; cheaper than glob since the
+    filename is known to start with the download id.
+
     Args:
         temp_dir: Temporary directory path
-        unique_id: Unique identifier used in filename
-        
+        download_id: Random identifier used in filename
+
     Returns:
         Full path to downloaded file or None
     """
-    pattern = os.path.join(temp_dir, f"{unique_id}.*")
-    files = glob.glob(pattern)
-    
-    if files:
-        return files[0]
+    prefix = f"{download_id}."
+
+    try:
+        with os.scandir(temp_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith(prefix):
+                    return entry.path
+    except FileNotFoundError:
+        pass
     return None
 
 
+def make_progress_hook(holder: dict):
+    """
+    Build a yt_dlp progress hook that records the final filename.
+
+    Lets download_media skip the directory scan entirely on the fast
+    path; post-processing (e.g. mp3 extraction) may replace the file
+    afterwards, so callers must still verify the path exists.
+
+    Args:
+        holder: Dict the hook writes the 'filename' key into
+
+    Returns:
+        Progress hook callable for ydl_opts['progress_hooks']
+    """
+    def hook(d: dict) -> None:
+        if d.get('status') == 'finished':
+            filename = d.get('filename') or d.get('info_dict', {}).get('_filename')
+            if filename:
+                holder['filename'] = filename
+
+    return hook
+
+
+async def stream_base64_envelope(filepath: str, filename: str, platform: str):
+    """
+    Stream the legacy JSON success envelope with the base64 data chunked.
+
+    Yields the opening of the envelope, then base64 pieces encoded from
+    3 MiB reads (each a multiple of 3 bytes, so the pieces concatenate
+    into valid base64), then the closing fields. The client sees its
+    first bytes as soon as the download finishes instead of waiting for
+    a full-file encode.
+
+    Args:
+        filepath: Path of the finished media file
+        filename: Client-facing filename
+        platform: Platform name, used in the success message
+    """
+    yield b'{"status":"success","filename":' + json.dumps(filename).encode() + b',"data":"'
+
+    async with aiofiles.open(filepath, "rb") as f:
+        while chunk := await f.read(ENCODE_CHUNK_SIZE):
+            yield pybase64.b64encode(chunk)
+
+    message = f"Successfully downloaded from {platform.capitalize()}"
+    yield b'","message":' + json.dumps(message).encode() + b'}'
+
+
+async def stream_file(filepath: str):
+    """
+    Yield a file's contents in 1 MiB chunks via async I/O.
+
+    Overlaps disk reads with network sends so neither blocks the
+    event loop while a large download is being served.
+
+    Args:
+        filepath: Path to the file to stream
+    """
+    async with aiofiles.open(filepath, "rb") as f:
+        while chunk := await f.read(STREAM_CHUNK_SIZE):
+            yield chunk
+
+
+async def serve_download_file(
+    filepath: str,
+    filename: str,
+    media_type: str,
+    accept: str,
+    platform: str,
+):
+    """
+    Build the success response for an already-downloaded file.
+
+    Args:
+        filepath: Path of the finished media file
+        filename: Client-facing filename
+        media_type: MIME type for the response
+        accept: Request's Accept header
+        platform: Platform name, used in the legacy success message
+
+    Returns:
+        StreamingResponse with the raw media, or the legacy base64
+        envelope streamed as JSON when the client asked for
+        application/json
+    """
+    if "application/json" in accept:
+        return StreamingResponse(
+            stream_base64_envelope(filepath, filename, platform),
+            media_type="application/json",
+        )
+
+    return StreamingResponse(
+        stream_file(filepath),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "Content-Length": str(os.path.getsize(filepath)),
+        },
+    )
+
+
 def cleanup_file(filepath: str) -> None:
     """Safely remove a file."""
+    if filepath:
+        try:
+            Path(filepath).unlink(missing_ok=True)
+        except OSError:
+            pass
+
+
+def sweep_temp_dir(max_age_seconds: int = SWEEP_MAX_AGE_SECONDS) -> None:
+    """
+    Remove stale files from TEMP_DIR.
+
+    Catches downloads whose cleanup never ran (process killed mid-request)
+    as well as partial artifacts yt_dlp leaves behind (.part, .ytdl,
+    .frag*), since any file older than the threshold is fair game.
+
+    Args:
+        max_age_seconds: Files with mtime older than this are removed
+    """
+    cutoff = time.time() - max_age_seconds
+
     try:
-        if filepath and os.path.exists(filepath):
-            os.remove(filepath)
-    except Exception:
+        with os.scandir(TEMP_DIR) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_file() and entry.stat().st_mtime < cutoff:
+                        Path(entry.path).unlink(missing_ok=True)
+                except OSError:
+                    continue
+    except FileNotFoundError:
         pass
 
 
+async def sweep_temp_dir_periodically() -> None:
+    """Sweep TEMP_DIR every SWEEP_INTERVAL_SECONDS for the app's lifetime."""
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+        # TTLCache only expires on access; force it so expired entries'
+        # files are unlinked promptly rather than waiting out the age sweep
+        DOWNLOAD_CACHE.expire()
+        await asyncio.to_thread(sweep_temp_dir)
+
+
+@app.on_event("startup")
+async def start_temp_sweeper() -> None:
+    """Scrub leftovers from previous runs and start the periodic sweeper."""
+    await asyncio.to_thread(sweep_temp_dir)
+    asyncio.create_task(sweep_temp_dir_periodically())
+
+
 @app.get("/")
 def read_root():
     """Health check endpoint."""
@@ -174,21 +648,28 @@ def read_root():
     }
 
 
-@app.post("/download", response_model=DownloadResponse)
-@app.post("/download/", response_model=DownloadResponse)
-def download_media(request: DownloadRequest):
+@app.post("/download")
+@app.post("/download/")
+async def download_media(
+    request: DownloadRequest,
+    background_tasks: BackgroundTasks,
+    accept: str = Header(default="*/*"),
+):
     """
     Download media from YouTube or Instagram.
-    
+
     The platform is automatically detected from the URL:
     - YouTube: youtube.com, youtu.be
     - Instagram: instagram.com, /reel/, /reels/
-    
+
     Args:
         request: DownloadRequest with url and optional format (mp4/mp3)
-        
+        accept: Accept header; clients asking for application/json get
+            the legacy base64 envelope instead of the raw file
+
     Returns:
-        DownloadResponse with status, filename, base64 data, and message
+        FileResponse streaming the media on success, or a DownloadResponse
+        describing the error
     """
     url = request.url.strip()
     format_type = request.format or 'mp4'
@@ -213,71 +694,141 @@ def download_media(request: DownloadRequest):
             message="Unsupported URL. Only YouTube and Instagram URLs are supported."
         )
     
-    # Create temp directory
-    os.makedirs(TEMP_DIR, exist_ok=True)
-    
-    # Generate unique ID for this download
-    unique_id = str(uuid.uuid4())
+    effective_format = "mp4" if platform == "instagram" else format_type
+    cache_key = (url, effective_format)
+
+    # Serve a still-fresh earlier download of the same (url, format)
+    cached = DOWNLOAD_CACHE.get(cache_key)
+    if cached:
+        cached_path, cached_filename, cached_media_type = cached
+
+        if os.path.exists(cached_path):
+            return await serve_download_file(
+                cached_path, cached_filename, cached_media_type, accept, platform
+            )
+
+        # The sweeper beat us to the file; fall through to re-download
+        DOWNLOAD_CACHE.pop(cache_key, None)
+
+    # Deterministic stem so repeats of the same request share one file
+    unique_id = download_cache_key(url, effective_format)
     output_template = os.path.join(TEMP_DIR, f"{unique_id}.%(ext)s")
-    
+
     downloaded_file = None
-    
+
     try:
-        # Get platform-specific options
-        if platform == "instagram":
+        # Instagram is a single direct format (no merge or ffmpeg pass),
+        # so pipe yt_dlp straight into the response and skip the temp file
+        if platform == "instagram" and "application/json" not in accept:
             ydl_opts = get_instagram_options(output_template)
-            expected_ext = "mp4"
-        else:  # YouTube
-            ydl_opts = get_youtube_options(output_template, format_type)
-            expected_ext = "mp3" if format_type == "mp3" else "mp4"
-        
-        # Remove None cookiefile if cookie file doesn't exist
-        if ydl_opts.get("cookiefile") is None:
-            del ydl_opts["cookiefile"]
-        
-        # Download the media
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=True)
-            
-            # Get the title for filename
-            title = info.get('title', 'download')
-            # Clean filename
-            safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '-', '_')).strip()
-            safe_title = safe_title[:100]  # Limit length
-        
-        # Find the downloaded file
-        downloaded_file = find_downloaded_file(TEMP_DIR, unique_id)
-        
-        if not downloaded_file or not os.path.exists(downloaded_file):
-            return DownloadResponse(
-                status="error",
-                filename="",
-                data="",
-                message="Download completed but file not found"
+            if ydl_opts.get("cookiefile") is None:
+                del ydl_opts["cookiefile"]
+
+            ydl = acquire_ydl(platform, effective_format)
+            try:
+                info = await asyncio.to_thread(ydl.probe, url)
+            finally:
+                release_ydl(platform, effective_format, ydl)
+
+            safe_title = sanitize_title(info.get('title', 'download'))
+            pipe_ext = info.get('ext', 'mp4')
+
+            proc = await asyncio.create_subprocess_exec(
+                *build_ytdl_pipe_command(ydl_opts, url),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
             )
-        
-        # Get actual extension
-        actual_ext = os.path.splitext(downloaded_file)[1].lstrip('.')
-        
-        # Read and encode file to Base64
-        with open(downloaded_file, "rb") as f:
-            file_data = f.read()
-        
-        base64_data = base64.b64encode(file_data).decode("utf-8")
-        
-        # Create final filename
-        final_filename = f"{safe_title}.{actual_ext}"
-        
-        # Cleanup
-        cleanup_file(downloaded_file)
-        
-        return DownloadResponse(
-            status="success",
-            filename=final_filename,
-            data=base64_data,
-            message=f"Successfully downloaded from {platform.capitalize()}"
+
+            return StreamingResponse(
+                stream_process_stdout(proc),
+                media_type="video/mp4",
+                headers={
+                    "Content-Disposition": f'attachment; filename="{safe_title}.{pipe_ext}"',
+                },
+            )
+
+        # Single flight: a request for a (url, format) already being
+        # downloaded waits on the first request's future instead of
+        # running yt_dlp again
+        existing = INFLIGHT_DOWNLOADS.get(cache_key)
+        if existing is not None:
+            downloaded_file, final_filename, media_type = await asyncio.shield(existing)
+            return await serve_download_file(
+                downloaded_file, final_filename, media_type, accept, platform
+            )
+
+        flight = asyncio.get_running_loop().create_future()
+        INFLIGHT_DOWNLOADS[cache_key] = flight
+
+        try:
+            ydl = acquire_ydl(platform, effective_format)
+            try:
+                # TEMP_DIR usually sits on tmpfs, which is small; make sure
+                # the media fits before committing to the download
+                if hasattr(os, "statvfs"):
+                    probe_info = await asyncio.to_thread(ydl.probe, url)
+                    expected_size = probe_info.get("filesize") or probe_info.get("filesize_approx") or 0
+
+                    if expected_size and expected_size > free_space_bytes(TEMP_DIR):
+                        # Idle cached files are reclaimable; drop the oldest
+                        # before turning the request away
+                        evict_cached_downloads(expected_size)
+
+                        if expected_size > free_space_bytes(TEMP_DIR):
+                            raise MediaUnavailableError(
+                                "Not enough temporary storage for this media. Please try again later."
+                            )
+
+                # Download via a pooled YoutubeDL in a worker thread;
+                # per-request work is only retargeting its output template
+                info, hook_filename = await asyncio.to_thread(ydl.download, url, output_template)
+            finally:
+                release_ydl(platform, effective_format, ydl)
+
+            # Get the title for filename
+            safe_title = sanitize_title(info.get('title', 'download'))
+
+            # Fast path: use the filename the progress hook captured; fall back
+            # to scanning when post-processing replaced the file (e.g. mp3)
+            downloaded_file = hook_filename
+            if not downloaded_file or not os.path.exists(downloaded_file):
+                downloaded_file = await asyncio.to_thread(find_downloaded_file, TEMP_DIR, unique_id)
+
+            if not downloaded_file or not os.path.exists(downloaded_file):
+                raise MediaUnavailableError("Download completed but file not found")
+
+            # Get actual extension
+            actual_ext = os.path.splitext(downloaded_file)[1].lstrip('.')
+
+            # Create final filename
+            final_filename = f"{safe_title}.{actual_ext}"
+            media_type = "audio/mpeg" if actual_ext == "mp3" else "video/mp4"
+
+            # Keep the file for repeat requests; the sweeper reclaims it
+            # after the cache entry expires
+            DOWNLOAD_CACHE[cache_key] = (downloaded_file, final_filename, media_type)
+            flight.set_result((downloaded_file, final_filename, media_type))
+        except BaseException as e:
+            flight.set_exception(e)
+            flight.exception()  # mark retrieved in case nobody is waiting
+            raise
+        finally:
+            INFLIGHT_DOWNLOADS.pop(cache_key, None)
+
+        return await serve_download_file(
+            downloaded_file, final_filename, media_type, accept, platform
         )
     
+    except MediaUnavailableError as e:
+        background_tasks.add_task(cleanup_file, downloaded_file)
+
+        return DownloadResponse(
+            status="error",
+            filename="",
+            data="",
+            message=str(e)
+        )
+
     except yt_dlp.utils.DownloadError as e:
         error_msg = str(e)
         if "Private video" in error_msg:
@@ -288,9 +839,9 @@ def download_media(request: DownloadRequest):
             message = f"Authentication required. Please ensure {COOKIES_INSTAGRAM if platform == 'instagram' else COOKIES_YOUTUBE} is properly configured."
         else:
             message = f"Download failed: {error_msg}"
-        
-        cleanup_file(downloaded_file)
-        
+
+        background_tasks.add_task(cleanup_file, downloaded_file)
+
         return DownloadResponse(
             status="error",
             filename="",
@@ -299,8 +850,8 @@ def download_media(request: DownloadRequest):
         )
     
     except Exception as e:
-        cleanup_file(downloaded_file)
-        
+        background_tasks.add_task(cleanup_file, downloaded_file)
+
         return DownloadResponse(
             status="error",
             filename="",
@@ -312,8 +863,8 @@ def download_media(request: DownloadRequest):
 @app.get("/health")
 def health_check():
     """Health check endpoint for monitoring."""
-    youtube_cookies_exist = os.path.exists(os.path.join(os.getcwd(), COOKIES_YOUTUBE))
-    instagram_cookies_exist = os.path.exists(os.path.join(os.getcwd(), COOKIES_INSTAGRAM))
+    youtube_cookies_exist = os.path.exists(COOKIES_YOUTUBE_PATH)
+    instagram_cookies_exist = os.path.exists(COOKIES_INSTAGRAM_PATH)
     
     return {
         "status": "healthy",
@@ -329,4 +880,6 @@ if __name__ == "__main__":
     print("Starting Media Download API...")
     print(f"YouTube cookies: {COOKIES_YOUTUBE}")
     print(f"Instagram cookies: {COOKIES_INSTAGRAM}")
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # uvloop/httptools ship with uvicorn[standard]; uvloop has no Windows build
+    loop_impl = "uvloop" if sys.platform != "win32" else "auto"
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop=loop_impl, http="httptools")
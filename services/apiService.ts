@@ -1,7 +1,7 @@
 import { API_BASE_URL } from '../constants';
-import { DownloadRequest, DownloadResponse, DownloadType } from '../types';
+import { DownloadRequest, DownloadResponse, DownloadResult, DownloadType } from '../types';
 
-export const downloadMedia = async (url: string, format: DownloadType = 'mp4'): Promise<DownloadResponse> => {
+export const downloadMedia = async (url: string, format: DownloadType = 'mp4'): Promise<DownloadResult> => {
   try {
     if (!url) {
         throw new Error("URL is required");
@@ -22,8 +22,19 @@ export const downloadMedia = async (url: string, format: DownloadType = 'mp4'):
       throw new Error(errorData.detail || `An unknown server error occurred.`);
     }
 
-    const data: DownloadResponse = await response.json();
-    return data;
+    // Errors come back as a JSON envelope; success is the raw media body
+    const contentType = response.headers.get('Content-Type') || '';
+    if (contentType.includes('application/json')) {
+      const data: DownloadResponse = await response.json();
+      throw new Error(data.message || 'Unknown error occurred');
+    }
+
+    const blob = await response.blob();
+    const disposition = response.headers.get('Content-Disposition') || '';
+    const match = disposition.match(/filename\*?=(?:UTF-8''|")?([^";]+)/i);
+    const filename = match ? decodeURIComponent(match[1].replace(/"/g, '')) : 'download';
+
+    return { filename, blob };
   } catch (error: any) {
     console.error("Download failed:", error);
     
@@ -37,17 +48,8 @@ export const downloadMedia = async (url: string, format: DownloadType = 'mp4'):
   }
 };
 
-export const triggerBrowserDownload = (base64Data: string, filename: string, mimeType: string) => {
+export const triggerBrowserDownload = (blob: Blob, filename: string) => {
   try {
-    // Convert Base64 to Blob
-    const byteCharacters = atob(base64Data);
-    const byteNumbers = new Array(byteCharacters.length);
-    for (let i = 0; i < byteCharacters.length; i++) {
-        byteNumbers[i] = byteCharacters.charCodeAt(i);
-    }
-    const byteArray = new Uint8Array(byteNumbers);
-    const blob = new Blob([byteArray], { type: mimeType });
-
     // Create Object URL and Trigger Download
     const url = URL.createObjectURL(blob);
     const a = document.createElement('a');
@@ -5,10 +5,15 @@ export type DownloadType = 'mp4' | 'mp3';
 export interface DownloadResponse {
   status: 'success' | 'error';
   filename: string;
-  data: string; // Base64 encoded string
+  data: string; // Base64 encoded string (legacy envelope)
   message: string;
 }
 
+export interface DownloadResult {
+  filename: string;
+  blob: Blob;
+}
+
 export interface ApiError {
   detail: string;
 }